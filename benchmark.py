@@ -31,10 +31,12 @@ class TCPRadioBenchmark:
     
     def _recv_exactly(self, n):
         """TCP stream handling - recv until we have exactly n bytes"""
-        data = b''
-        while len(data) < n:
-            chunk = self.sock.recv(n - len(data))
-            if not chunk:
+        buf = bytearray(n)
+        view = memoryview(buf)
+        off = 0
+        while off < n:
+            got = self.sock.recv_into(view[off:])
+            if not got:
                 raise ConnectionError("Socket closed")
-            data += chunk
-        return data
\ No newline at end of file
+            off += got
+        return buf
\ No newline at end of file
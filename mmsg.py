@@ -0,0 +1,131 @@
+"""
+Batched UDP send/receive using Linux sendmmsg(2) / recvmmsg(2)
+
+A thin ctypes wrapper so the benchmark can move a whole burst of datagrams
+with one syscall instead of one sendto/recvfrom per packet. Every datagram
+lives in a fixed-size slot of one preallocated bytearray, and the kernel
+reads/writes those slots directly (no per-packet Python bytes objects).
+
+Only available on Linux/glibc; check AVAILABLE before using MMsgBatch.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import socket
+import struct
+from typing import Optional, Tuple
+
+###############################################################################
+# libc bindings
+###############################################################################
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),  # socklen_t
+        ('msg_iov', ctypes.POINTER(_IoVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_hdr', _MsgHdr),
+        ('msg_len', ctypes.c_uint),
+    ]
+
+def _load_libc():
+    """Return libc if it provides sendmmsg/recvmmsg, else None"""
+    name = ctypes.util.find_library('c')
+    if not name:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+    except OSError:
+        return None
+    if not (hasattr(libc, 'sendmmsg') and hasattr(libc, 'recvmmsg')):
+        return None
+    
+    libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    libc.sendmmsg.restype = ctypes.c_int
+    libc.recvmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                              ctypes.c_void_p]
+    libc.recvmmsg.restype = ctypes.c_int
+    return libc
+
+_libc = _load_libc()
+AVAILABLE = _libc is not None
+
+###############################################################################
+# Batch buffer
+###############################################################################
+
+class MMsgBatch:
+    """Preallocated ring of `count` datagram slots of `slot_size` bytes each"""
+    
+    def __init__(self, count: int, slot_size: int, addr: Optional[Tuple[str, int]] = None):
+        self.count = count
+        self.slot_size = slot_size
+        self.buf = bytearray(count * slot_size)
+        self._view = memoryview(self.buf)
+        
+        # Alias the bytearray so the iovecs point straight into it
+        self._cbuf = (ctypes.c_char * len(self.buf)).from_buffer(self.buf)
+        base = ctypes.addressof(self._cbuf)
+        
+        # Destination for sends (IPv4 sockaddr_in), shared by every message
+        self._name = None
+        if addr is not None:
+            host, port = addr
+            sockaddr = struct.pack('=H', socket.AF_INET) + struct.pack('!H', port) + \
+                socket.inet_aton(socket.gethostbyname(host)) + bytes(8)
+            self._name = ctypes.create_string_buffer(sockaddr, len(sockaddr))
+        
+        self._iov = (_IoVec * count)()
+        self._msgs = (_MMsgHdr * count)()
+        for i in range(count):
+            self._iov[i].iov_base = base + i * slot_size
+            self._iov[i].iov_len = slot_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iov[i])
+            hdr.msg_iovlen = 1
+            if self._name is not None:
+                hdr.msg_name = ctypes.addressof(self._name)
+                hdr.msg_namelen = len(self._name)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def slot(self, i: int) -> memoryview:
+        """Writable view of slot i"""
+        return self._view[i * self.slot_size:(i + 1) * self.slot_size]
+    
+    def length(self, i: int) -> int:
+        """Length of the datagram received into slot i by the last recv()"""
+        return self._msgs[i].msg_len
+    
+    def send(self, fd: int, start: int, n: int) -> int:
+        """Send slots start..start+n-1 with one sendmmsg; returns datagrams sent"""
+        sent = _libc.sendmmsg(fd, ctypes.byref(self._msgs, start * ctypes.sizeof(_MMsgHdr)),
+                              n, 0)
+        if sent < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return sent
+    
+    def recv(self, fd: int) -> int:
+        """Receive up to count datagrams without blocking; returns datagrams received"""
+        got = _libc.recvmmsg(fd, self._msgs, self.count, socket.MSG_DONTWAIT, None)
+        if got < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return got
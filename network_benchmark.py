@@ -8,15 +8,25 @@ This simplified version is perfect for:
 - Developing on Raspberry Pis in a lab environment
 """
 
+import asyncio
+import errno
+import multiprocessing
+import os
+import queue
+import selectors
+import signal
 import socket
 import struct
 import time
 import threading
 import json
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from typing import Optional, Tuple, List, Dict
 from enum import Enum
 import argparse
+from array import array
+
+import mmsg
 
 ###############################################################################
 # Configuration
@@ -40,6 +50,17 @@ class BenchmarkConfig:
     send_delay: float = 0.01  # seconds between packets
     timeout: float = 5.0
     
+    # Socket tuning
+    sndbuf: int = 4 * 1024 * 1024  # SO_SNDBUF request (kernel caps at net.core.wmem_max)
+    rcvbuf: int = 4 * 1024 * 1024  # SO_RCVBUF request (kernel caps at net.core.rmem_max)
+    batch_size: int = 1  # UDP datagrams per sendmmsg/recvmmsg call (1 = no batching)
+    busy_poll_us: int = 0  # SO_BUSY_POLL spin time per read (0 = off; burns a CPU core)
+    
+    # Scheduling (Linux; None = leave to the OS)
+    sender_cpu: Optional[int] = None  # Pin the sender's event loop thread to this CPU
+    receiver_cpu: Optional[int] = None  # Pin the receiver's event loop thread to this CPU
+    rt_priority: Optional[int] = None  # SCHED_FIFO priority for the event loop thread
+    
     # Role
     is_sender: bool = True  # True = send packets, False = receive only
     is_receiver: bool = True  # Can be both sender and receiver
@@ -52,7 +73,7 @@ class BenchmarkConfig:
 
 @dataclass
 class PacketMetrics:
-    """Metrics for a single packet"""
+    """Metrics for a single packet (one row of the results file's "metrics" list)"""
     msg_id: int
     send_time: float
     recv_time: float
@@ -62,6 +83,36 @@ class PacketMetrics:
     def to_dict(self):
         return asdict(self)
 
+# Sender pacing: below this send_delay the event loop timer is too coarse,
+# so the sender spins on perf_counter_ns for the final _PACE_SPIN_NS
+_PACE_SLEEP_MIN_DELAY = 0.002
+_PACE_SPIN_NS = 50_000
+
+# TCP connect retry: backoff doubles from MIN to MAX until TIMEOUT seconds
+# have passed, so a peer that comes up a few ms late is picked up right away
+_CONNECT_BACKOFF_MIN = 0.01
+_CONNECT_BACKOFF_MAX = 1.0
+_CONNECT_TIMEOUT = 10.0
+
+# "Next msg_id to log" when logging is off; larger than any 32-bit msg_id
+_NEVER_LOG = 1 << 62
+
+# Not exported by the socket module; value from <asm-generic/socket.h>
+SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46)
+
+# MSG_ZEROCOPY (Linux >= 4.14) for large TCP sends; constants from the kernel
+# headers where the socket module doesn't export them
+SO_ZEROCOPY = getattr(socket, 'SO_ZEROCOPY', 60)
+MSG_ZEROCOPY = getattr(socket, 'MSG_ZEROCOPY', 0x4000000)
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+SO_EE_ORIGIN_ZEROCOPY = 5
+SO_EE_CODE_ZEROCOPY_COPIED = 1
+_ZEROCOPY_MIN_PAYLOAD = 10 * 1024  # Below this, page pinning costs more than the copy
+_ZEROCOPY_RING = 8  # Frames that may be in flight (owned by the kernel) at once
+
+# struct sock_extended_err: errno, origin, type, code, pad, info, data
+_SOCK_EXTENDED_ERR = struct.Struct('=IBBBBII')
+
 ###############################################################################
 # Network Benchmark Class
 ###############################################################################
@@ -79,15 +130,53 @@ class NetworkBenchmark:
         self.client_addr: Optional[Tuple] = None  # For UDP
         
         # Tracking
-        self.sent_packets: Dict[int, float] = {}  # msg_id -> send_time
-        self.metrics: List[PacketMetrics] = []
+        # msg_id -> send_time_ns; msg_ids run 1..max_packets so a dense array suffices
+        self.sent_packets = array('q')
+        if config.is_sender:
+            self.sent_packets = array('q', bytes(8 * (config.max_packets + 1)))
+        self._sent_count = 0
+        
+        # Next received msg_id to print a progress line for
+        self._next_rx_log = config.log_frequency if config.print_logs else _NEVER_LOG
+        
+        # Received packet metrics, one parallel array per PacketMetrics field.
+        # Times are integer nanoseconds; they are only scaled for display/saving.
+        self._msg_id = array('I')
+        self._send_time_ns = array('q')
+        self._recv_time_ns = array('q')
+        self._payload_size = array('I')
+        self._latency_ns = array('q')
+        
+        # Event loop (sender and receiver run as coroutines on one thread)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.io_thread: Optional[threading.Thread] = None
+        self.sender_done = threading.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._transport: Optional[asyncio.DatagramTransport] = None  # For UDP
+        self._tx_batch: Optional[mmsg.MMsgBatch] = None  # For batched UDP
+        self._rx_batch: Optional[mmsg.MMsgBatch] = None
         
-        # Threads
-        self.sender_thread: Optional[threading.Thread] = None
-        self.receiver_thread: Optional[threading.Thread] = None
+        # MSG_ZEROCOPY state: the kernel numbers each zerocopy send call, and a
+        # ring frame may only be rewritten once its last send has completed
+        self._zc_ring: Optional[List[bytearray]] = None
+        self._zc_ring_seq: List[int] = []  # Last send number using each frame
+        self._zc_next = 0  # Next send number
+        self._zc_done = 0  # All send numbers below this have completed
+        self._zc_slot = 0
         
-        # Thread safety
-        self._lock = threading.Lock()
+        # Receiver process (used when acting as both sender and receiver)
+        self._receiver_process: Optional[multiprocessing.Process] = None
+        self._receiver_stop: Optional[multiprocessing.Event] = None
+        self._receiver_results: Optional[multiprocessing.Queue] = None
+        
+        # Header: MSG_ID (4) + TIMESTAMP_NS (8) + PAYLOAD_LENGTH (4)
+        # TIMESTAMP_NS is wall-clock time.time_ns(), so one-way latency is only
+        # meaningful when both Pis share a clock source (NTP/PTP-synced).
+        self._hdr_struct = struct.Struct('<IqI')
+        
+        # Reusable transmit frame; only the header is rewritten per packet
+        self._tx_buf = bytearray(self._hdr_struct.size + config.payload_size)
+        self._tx_buf[self._hdr_struct.size:] = b'a' * config.payload_size
     
     ###########################################################################
     # Connection Management
@@ -100,6 +189,14 @@ class NetworkBenchmark:
         print(f"Mode: {self.config.mode.value.upper()}")
         print(f"{'='*70}\n")
         
+        # Keep the two roles in separate interpreters so they don't contend for the GIL
+        if self.config.is_sender and self.config.is_receiver:
+            self._start_receiver_process()
+        
+        self._open()
+    
+    def _open(self):
+        """Set up sockets and start the event loop for the roles run in this process"""
         self.running = True
         
         # Setup network connection
@@ -108,16 +205,14 @@ class NetworkBenchmark:
         else:
             self._setup_udp()
         
-        # Start threads based on role
-        if self.config.is_receiver:
-            self.receiver_thread = threading.Thread(target=self._receiver_loop, daemon=True)
-            self.receiver_thread.start()
-            print(f"[Receiver] Started listening on port {self.config.port}")
+        # Run sender/receiver coroutines on a single event loop thread
+        self.loop = asyncio.new_event_loop()
+        self.io_thread = threading.Thread(target=self._run_event_loop, daemon=True)
+        self.io_thread.start()
         
+        if self._receives_here():
+            print(f"[Receiver] Started listening on port {self.config.port}")
         if self.config.is_sender:
-            time.sleep(0.5)  # Let receiver start first
-            self.sender_thread = threading.Thread(target=self._sender_loop, daemon=True)
-            self.sender_thread.start()
             print(f"[Sender] Started sending to {self.config.host}:{self.config.port}")
     
     def stop(self):
@@ -126,13 +221,30 @@ class NetworkBenchmark:
         print(f"Stopping benchmark...")
         print(f"{'='*70}\n")
         
+        self._close()
+        
+        if self._receiver_process:
+            self._collect_receiver_process()
+        
+        # Process and display results
+        stats = self._compute_stats()
+        self._display_results(stats)
+        
+        # Save results if configured
+        if self.config.save_results:
+            self._save_results(stats)
+    
+    def _close(self):
+        """Stop the event loop and close sockets"""
         self.running = False
         
-        # Wait for threads
-        if self.sender_thread:
-            self.sender_thread.join(timeout=5)
-        if self.receiver_thread:
-            self.receiver_thread.join(timeout=5)
+        # Wake any coroutine still blocked on the network, then wait for the loop
+        if self.io_thread:
+            try:
+                self.loop.call_soon_threadsafe(self._cancel_tasks)
+            except RuntimeError:
+                pass  # Loop already finished and closed
+            self.io_thread.join(timeout=5)
         
         # Close sockets
         if self.sock:
@@ -145,166 +257,469 @@ class NetworkBenchmark:
         
         if self.server_sock:
             self.server_sock.close()
+    
+    def _receives_here(self) -> bool:
+        """Whether this process runs the receiver itself rather than a child process"""
+        return self.config.is_receiver and self._receiver_process is None
+    
+    def _start_receiver_process(self):
+        """Spawn the receiver in a child process and wait until it is listening"""
+        ready = multiprocessing.Event()
+        self._receiver_stop = multiprocessing.Event()
+        self._receiver_results = multiprocessing.Queue()
+        self._receiver_process = multiprocessing.Process(
+            target=_receiver_entry,
+            args=(self.config, ready, self._receiver_stop, self._receiver_results),
+            daemon=True)
+        self._receiver_process.start()
         
-        # Process and display results
-        self._display_results()
+        if not ready.wait(timeout=10):
+            print(f"[Receiver] Receiver process did not start listening in time")
+    
+    def _collect_receiver_process(self):
+        """Stop the receiver process and merge its metrics into ours"""
+        self._receiver_stop.set()
+        try:
+            columns = self._receiver_results.get(timeout=10)
+        except queue.Empty:
+            print(f"[Receiver] No results from receiver process")
+            columns = None
+        self._receiver_process.join(timeout=5)
         
-        # Save results if configured
-        if self.config.save_results:
-            self._save_results()
+        if columns:
+            for ours, theirs in zip(self._metric_columns(), columns):
+                ours.extend(theirs)
+    
+    def _metric_columns(self) -> Tuple[array, ...]:
+        """Metric arrays in PacketMetrics field order"""
+        return (self._msg_id, self._send_time_ns, self._recv_time_ns,
+                self._payload_size, self._latency_ns)
     
     def _setup_tcp(self):
         """Setup TCP connection"""
-        if self.config.is_receiver:
+        if self._receives_here():
             # Create server socket
             self.server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._set_buffer_sizes(self.server_sock)  # Inherited by accepted socket
+            self._set_busy_poll(self.server_sock)  # Likewise
             self.server_sock.bind(('0.0.0.0', self.config.port))
             self.server_sock.listen(1)
-            self.server_sock.settimeout(1.0)  # Non-blocking accept
+            self.server_sock.setblocking(False)  # Accepted via the event loop
             print(f"[TCP] Listening on port {self.config.port}")
         
         if self.config.is_sender:
-            # Create client socket
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Retries for when other Pi isn't ready yet
+            self.sock = self._connect_tcp()
+            self._set_quickack(self.sock)
+            print(f"[TCP] Connected to {self.config.host}:{self.config.port}")
             
-            # Try to connect (with retries for when other Pi isn't ready yet)
-            max_retries = 10
-            for attempt in range(max_retries):
-                try:
-                    self.sock.connect((self.config.host, self.config.port))
-                    print(f"[TCP] Connected to {self.config.host}:{self.config.port}")
-                    break
-                except ConnectionRefusedError:
-                    if attempt < max_retries - 1:
-                        print(f"[TCP] Connection refused, retrying ({attempt+1}/{max_retries})...")
-                        time.sleep(1)
-                    else:
-                        raise
+            self._enable_zerocopy()
+    
+    def _new_tcp_client(self, log: bool = True) -> socket.socket:
+        """Create a non-blocking client socket with all pre-connect options applied"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._set_buffer_sizes(sock, log)
+        self._set_busy_poll(sock)
+        sock.setblocking(False)  # Sent via the event loop
+        return sock
+    
+    def _connect_tcp(self) -> socket.socket:
+        """Connect to the receiver, retrying refused connects with exponential backoff
+        
+        Each attempt is a non-blocking connect waited on with a selector. A
+        refused socket is closed and replaced with a fresh one rather than
+        reused, so no failed-connect state carries over between attempts.
+        """
+        addr = (self.config.host, self.config.port)
+        deadline = time.monotonic() + _CONNECT_TIMEOUT
+        backoff = _CONNECT_BACKOFF_MIN
+        attempt = 0
+        
+        with selectors.DefaultSelector() as selector:
+            while True:
+                attempt += 1
+                sock = self._new_tcp_client(log=attempt == 1)
+                err = sock.connect_ex(addr)
+                if err == errno.EINPROGRESS:
+                    # The socket turns writable once the handshake succeeds or fails
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    ready = selector.select(max(0.0, deadline - time.monotonic()))
+                    selector.unregister(sock)
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) if ready \
+                        else errno.ETIMEDOUT
+                if err == 0:
+                    return sock
+                
+                sock.close()
+                if err != errno.ECONNREFUSED or time.monotonic() + backoff >= deadline:
+                    raise OSError(err, f"{os.strerror(err)} ({addr[0]}:{addr[1]})")
+                print(f"[TCP] Connection refused, retrying in {backoff * 1000:.0f} ms "
+                      f"(attempt {attempt})...")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, _CONNECT_BACKOFF_MAX)
     
     def _setup_udp(self):
         """Setup UDP socket"""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._set_buffer_sizes(self.sock)
+        self._set_busy_poll(self.sock)
         
-        if self.config.is_receiver:
+        if self._receives_here():
             self.sock.bind(('0.0.0.0', self.config.port))
             print(f"[UDP] Listening on port {self.config.port}")
         else:
             # Sender doesn't need to bind for UDP
             print(f"[UDP] Ready to send to {self.config.host}:{self.config.port}")
+    
+    def _set_buffer_sizes(self, sock: socket.socket, log: bool = True):
+        """Request larger socket buffers and log what the kernel actually granted"""
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.config.sndbuf)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.config.rcvbuf)
+        if not log:
+            return
         
-        self.sock.settimeout(1.0)
+        # Linux doubles the requested value and caps it at net.core.{w,r}mem_max
+        sndbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        print(f"[Socket] SO_SNDBUF={sndbuf} bytes, SO_RCVBUF={rcvbuf} bytes "
+              f"(requested {self.config.sndbuf}/{self.config.rcvbuf})")
+        if sndbuf < self.config.sndbuf or rcvbuf < self.config.rcvbuf:
+            print(f"[Socket] Buffers capped by kernel; raise net.core.wmem_max / "
+                  f"net.core.rmem_max via sysctl to get the full size")
+    
+    def _set_busy_poll(self, sock: socket.socket):
+        """Opt-in: have the kernel spin-poll the NIC on reads instead of waiting for an IRQ
+        
+        Cuts wakeup latency at the cost of a busy CPU core. Because the event
+        loop waits in epoll, also raise net.core.busy_poll (and net.core.busy_read
+        for plain reads) via sysctl. Values above busy_read need CAP_NET_ADMIN.
+        """
+        if not self.config.busy_poll_us:
+            return
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, self.config.busy_poll_us)
+            print(f"[Socket] SO_BUSY_POLL={self.config.busy_poll_us} us")
+        except OSError as e:
+            print(f"[Socket] Could not enable SO_BUSY_POLL: {e}")
     
     ###########################################################################
     # Packet Operations
     ###########################################################################
     
-    def _create_packet(self, msg_id: int) -> bytes:
-        """Create a packet with header + payload"""
-        send_time = time.time()
-        
-        # Create payload
-        payload = b'a' * self.config.payload_size
+    def _create_packet(self, msg_id: int, buf: Optional[memoryview] = None) -> Tuple[bytearray, int]:
+        """Stamp the header of a pre-filled transmit frame (the reusable one by default)"""
+        if buf is None:
+            buf = self._tx_buf
+        send_time_ns = time.time_ns()
+        self._hdr_struct.pack_into(buf, 0, msg_id, send_time_ns, self.config.payload_size)
         
-        # Header: MSG_ID (4) + TIMESTAMP (8) + PAYLOAD_LENGTH (4)
-        header = struct.pack('<Idi', msg_id, send_time, len(payload))
-        
-        return header + payload, send_time
+        return buf, send_time_ns
     
-    def _parse_packet(self, data: bytes) -> Tuple[int, float, bytes]:
+    def _parse_packet(self, data: bytes) -> Tuple[int, int, bytes]:
         """Parse received packet"""
         if len(data) < 16:
             raise ValueError("Packet too short")
         
         # Parse header
-        msg_id, send_time, payload_len = struct.unpack('<Idi', data[:16])
+        msg_id, send_time_ns, payload_len = self._hdr_struct.unpack_from(data, 0)
         payload = data[16:16+payload_len]
         
-        return msg_id, send_time, payload
+        return msg_id, send_time_ns, payload
+    
+    ###########################################################################
+    # Event Loop
+    ###########################################################################
+    
+    def _run_event_loop(self):
+        """Thread entry point: run the sender/receiver coroutines to completion"""
+        self._apply_scheduling()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main_coro())
+        finally:
+            self.sender_done.set()
+            self.loop.close()
+    
+    def _apply_scheduling(self):
+        """Pin the calling thread to its role's CPU and raise it to SCHED_FIFO if configured
+        
+        On Linux, pid 0 in these calls means the calling thread, not the process.
+        """
+        cpu = self.config.sender_cpu if self.config.is_sender else self.config.receiver_cpu
+        role = "Sender" if self.config.is_sender else "Receiver"
+        
+        if cpu is not None and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, {cpu})
+                print(f"[{role}] Pinned to CPU {cpu}")
+            except OSError as e:
+                print(f"[{role}] Could not pin to CPU {cpu}: {e}")
+        
+        if self.config.rt_priority is not None and hasattr(os, 'sched_setscheduler'):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.config.rt_priority))
+                print(f"[{role}] SCHED_FIFO priority {self.config.rt_priority}")
+            except OSError as e:
+                print(f"[{role}] Could not set SCHED_FIFO (needs root/CAP_SYS_NICE): {e}")
+    
+    async def _main_coro(self):
+        """Start the coroutines for each configured role"""
+        if self.config.mode == TransportMode.UDP:
+            if self.config.batch_size > 1 and mmsg.AVAILABLE:
+                self._setup_udp_batches()
+            else:
+                self._transport, _ = await self.loop.create_datagram_endpoint(
+                    lambda: _DatagramReceiver(self), sock=self.sock)
+        
+        if self._receives_here():
+            self._tasks.append(asyncio.ensure_future(self._receiver_coro()))
+        if self.config.is_sender:
+            self._tasks.append(asyncio.ensure_future(self._sender_coro()))
+        
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    def _setup_udp_batches(self):
+        """Drive the UDP socket directly with sendmmsg/recvmmsg instead of a transport"""
+        self.sock.setblocking(False)
+        
+        if self.config.is_sender:
+            self._tx_batch = mmsg.MMsgBatch(self.config.batch_size, len(self._tx_buf),
+                                            addr=(self.config.host, self.config.port))
+            self._tx_batch.buf[:] = bytes(self._tx_buf) * self.config.batch_size
+        
+        if self._receives_here():
+            # Slots sized for any datagram; the sender's payload size isn't known here
+            self._rx_batch = mmsg.MMsgBatch(self.config.batch_size, 65535)
+            self.loop.add_reader(self.sock.fileno(), self._on_udp_batch_readable)
+        
+        print(f"[UDP] Batching {self.config.batch_size} datagrams per sendmmsg/recvmmsg")
+    
+    def _cancel_tasks(self):
+        """Cancel outstanding coroutines (called on the loop thread)"""
+        for task in self._tasks:
+            task.cancel()
     
     ###########################################################################
-    # Sender Loop
+    # Sender
     ###########################################################################
     
-    def _sender_loop(self):
+    async def _sender_coro(self):
         """Send packets at configured rate"""
         msg_id = 1
-        packets_sent = 0
+        
+        await asyncio.sleep(0.5)  # Let receiver start first
         
         print(f"[Sender] Sending {self.config.max_packets} packets...")
         print(f"[Sender] Payload size: {self.config.payload_size} bytes")
         print(f"[Sender] Send delay: {self.config.send_delay} seconds\n")
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        next_deadline = start_ns
+        next_log = self.config.log_frequency if self.config.print_logs else _NEVER_LOG
+        delay_ns = int(self.config.send_delay * 1e9)
+        pending = 0  # Packets stamped into the UDP batch but not yet flushed
+        
+        try:
+            while self.running and msg_id <= self.config.max_packets:
+                try:
+                    # Create packet
+                    zc_slot = self._claim_zerocopy_slot() if self._zc_ring else None
+                    if self._tx_batch:
+                        packet, send_time_ns = self._create_packet(msg_id, self._tx_batch.slot(pending))
+                    elif zc_slot is not None:
+                        packet, send_time_ns = self._create_packet(msg_id, self._zc_ring[zc_slot])
+                    else:
+                        packet, send_time_ns = self._create_packet(msg_id)
+                    
+                    # Send packet
+                    burst = 1
+                    if zc_slot is not None:  # TCP, large payload
+                        await self._send_zerocopy(zc_slot)
+                    elif self.config.mode == TransportMode.TCP:
+                        await self.loop.sock_sendall(self.sock, memoryview(packet))
+                    elif self._tx_batch:  # UDP, one sendmmsg per full batch
+                        pending += 1
+                        burst = 0
+                        if pending == len(self._tx_batch) or msg_id == self.config.max_packets:
+                            await self._flush_tx_batch(pending)
+                            burst, pending = pending, 0
+                    else:  # UDP
+                        self._transport.sendto(packet, (self.config.host, self.config.port))
+                    
+                    # Track sent packet
+                    self.sent_packets[msg_id] = send_time_ns
+                    self._sent_count += 1
+                    
+                    # Print progress
+                    if msg_id == next_log:
+                        next_log += self.config.log_frequency
+                        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+                        rate = self._sent_count / elapsed if elapsed > 0 else 0
+                        print(f"[Sender] Sent {msg_id}/{self.config.max_packets} packets "
+                              f"({rate:.1f} pkt/sec)")
+                    
+                    msg_id += 1
+                    if burst:
+                        # Absolute deadlines so send time doesn't add to the gap;
+                        # if we've fallen behind, restart from now instead of bursting
+                        next_deadline = max(next_deadline + delay_ns * burst,
+                                            time.perf_counter_ns())
+                        await self._pace(next_deadline)
+                    
+                except Exception as e:
+                    print(f"[Sender] Error sending packet {msg_id}: {e}")
+                    break
+            
+            # Stopped part-way through a batch
+            if pending:
+                await self._flush_tx_batch(pending)
+        finally:
+            print(f"\n[Sender] Finished! Sent {self._sent_count} packets\n")
+            self.sender_done.set()
+    
+    async def _pace(self, deadline_ns: int):
+        """Wait until deadline_ns on the perf_counter_ns clock"""
+        if self.config.send_delay >= _PACE_SLEEP_MIN_DELAY:
+            remaining = deadline_ns - time.perf_counter_ns()
+            if remaining > 0:
+                await asyncio.sleep(remaining / 1e9)
+            return
         
-        while self.running and msg_id <= self.config.max_packets:
+        # Sub-timer-resolution gaps: yield to the loop until close, then spin
+        while time.perf_counter_ns() < deadline_ns - _PACE_SPIN_NS:
+            await asyncio.sleep(0)
+        while time.perf_counter_ns() < deadline_ns:
+            pass
+    
+    async def _flush_tx_batch(self, count: int):
+        """Send the first count slots of the transmit batch"""
+        fd = self.sock.fileno()
+        sent = 0
+        while sent < count:
             try:
-                # Create packet
-                packet, send_time = self._create_packet(msg_id)
-                
-                # Send packet
-                if self.config.mode == TransportMode.TCP:
-                    self.sock.sendall(packet)
-                else:  # UDP
-                    self.sock.sendto(packet, (self.config.host, self.config.port))
-                
-                # Track sent packet
-                with self._lock:
-                    self.sent_packets[msg_id] = send_time
-                
-                packets_sent += 1
-                
-                # Print progress
-                if self.config.print_logs and msg_id % self.config.log_frequency == 0:
-                    elapsed = time.time() - start_time
-                    rate = packets_sent / elapsed if elapsed > 0 else 0
-                    print(f"[Sender] Sent {msg_id}/{self.config.max_packets} packets "
-                          f"({rate:.1f} pkt/sec)")
-                
-                msg_id += 1
-                time.sleep(self.config.send_delay)
-                
-            except Exception as e:
-                print(f"[Sender] Error sending packet {msg_id}: {e}")
-                break
+                sent += self._tx_batch.send(fd, sent, count - sent)
+            except BlockingIOError:
+                await self._wait_writable()
+    
+    async def _wait_writable(self):
+        """Wait until the socket has send buffer space again"""
+        fd = self.sock.fileno()
+        ready = self.loop.create_future()
+        self.loop.add_writer(fd, ready.set_result, None)
+        try:
+            await ready
+        finally:
+            self.loop.remove_writer(fd)
+    
+    def _enable_zerocopy(self):
+        """Use MSG_ZEROCOPY for large TCP payloads if the kernel supports it"""
+        if self.config.payload_size < _ZEROCOPY_MIN_PAYLOAD:
+            return
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, SO_ZEROCOPY, 1)
+        except OSError as e:
+            print(f"[TCP] MSG_ZEROCOPY unavailable ({e}), using sendall")
+            return
         
-        print(f"\n[Sender] Finished! Sent {packets_sent} packets\n")
+        # Frames handed to the kernel stay pinned until completion, so rotate a ring
+        self._zc_ring = [bytearray(self._tx_buf) for _ in range(_ZEROCOPY_RING)]
+        self._zc_ring_seq = [-1] * _ZEROCOPY_RING
+        print(f"[TCP] MSG_ZEROCOPY enabled")
+    
+    def _claim_zerocopy_slot(self) -> Optional[int]:
+        """Next ring frame the kernel has released, or None if all are in flight"""
+        self._drain_zerocopy_completions()
+        if self._zc_ring is None:
+            return None  # Disabled while draining
+        
+        slot = self._zc_slot
+        if self._zc_ring_seq[slot] >= self._zc_done:
+            return None  # Fall back to a copying send for this packet
+        self._zc_slot = (slot + 1) % len(self._zc_ring)
+        return slot
+    
+    async def _send_zerocopy(self, slot: int):
+        """Send a ring frame with MSG_ZEROCOPY, falling back to sendall on failure"""
+        view = memoryview(self._zc_ring[slot])
+        off = 0
+        while off < len(view):
+            try:
+                sent = self.sock.send(view[off:], MSG_ZEROCOPY)
+            except BlockingIOError:
+                await self._wait_writable()
+                continue
+            except OSError:
+                # e.g. ENOBUFS when optmem is exhausted; send the rest by copy
+                await self.loop.sock_sendall(self.sock, view[off:])
+                return
+            self._zc_ring_seq[slot] = self._zc_next
+            self._zc_next += 1
+            off += sent
+    
+    def _drain_zerocopy_completions(self):
+        """Read zerocopy completion notifications off the socket error queue"""
+        while True:
+            try:
+                _, ancdata, _, _ = self.sock.recvmsg(
+                    0, socket.CMSG_SPACE(_SOCK_EXTENDED_ERR.size),
+                    socket.MSG_ERRQUEUE | socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                return
+            
+            for level, ctype, data in ancdata:
+                if level != socket.SOL_IP or ctype != IP_RECVERR:
+                    continue
+                _, origin, _, code, _, first, last = _SOCK_EXTENDED_ERR.unpack_from(data)
+                if origin != SO_EE_ORIGIN_ZEROCOPY:
+                    continue
+                self._zc_done = max(self._zc_done, last + 1)
+                
+                if code & SO_EE_CODE_ZEROCOPY_COPIED and self._zc_ring is not None:
+                    # Kernel copied anyway (e.g. loopback), so pinning only adds cost
+                    print(f"[TCP] Kernel is copying MSG_ZEROCOPY sends, using sendall")
+                    self._zc_ring = None
     
     ###########################################################################
-    # Receiver Loop
+    # Receiver
     ###########################################################################
     
-    def _receiver_loop(self):
+    async def _receiver_coro(self):
         """Receive and process packets"""
         print(f"[Receiver] Listening for packets...\n")
         
-        # For TCP server, accept connection first
-        if self.config.mode == TransportMode.TCP and self.config.is_receiver:
-            print(f"[Receiver] Waiting for connection...")
-            while self.running:
-                try:
-                    self.sock, client_addr = self.server_sock.accept()
-                    self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                    print(f"[Receiver] Accepted connection from {client_addr}\n")
-                    break
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    print(f"[Receiver] Accept error: {e}")
-                    return
+        try:
+            if self.config.mode == TransportMode.TCP:
+                await self._receive_tcp()
+            else:
+                await self._watch_udp()
+        finally:
+            print(f"\n[Receiver] Finished! Received {len(self._msg_id)} packets\n")
+    
+    async def _receive_tcp(self):
+        """Accept the sender's connection and read framed packets off the stream"""
+        print(f"[Receiver] Waiting for connection...")
+        try:
+            self.sock, client_addr = await self.loop.sock_accept(self.server_sock)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._set_quickack(self.sock)
+            print(f"[Receiver] Accepted connection from {client_addr}\n")
+        except Exception as e:
+            print(f"[Receiver] Accept error: {e}")
+            return
         
-        packets_received = 0
         consecutive_timeouts = 0
         max_timeouts = 20
         
+        # The sender uses one payload size for the whole run: read the first frame
+        # generically, then switch to a reader specialized for that frame size
+        recv_frame = self._recv_tcp_packet
+        specialized = False
+        
         while self.running:
             try:
-                # Receive data
-                if self.config.mode == TransportMode.TCP:
-                    data = self._recv_tcp_packet()
-                else:  # UDP
-                    data, self.client_addr = self.sock.recvfrom(65535)
+                data = await recv_frame()
                 
                 if not data:
                     consecutive_timeouts += 1
@@ -314,85 +729,225 @@ class NetworkBenchmark:
                     continue
                 
                 consecutive_timeouts = 0
-                recv_time = time.time()
+                self._record_packet(data, time.time_ns())
                 
-                # Parse packet
-                msg_id, send_time, payload = self._parse_packet(data)
+                if not specialized:
+                    recv_frame = self._make_fixed_frame_reader(len(data))
+                    specialized = True
                 
-                # Calculate latency
-                latency_ms = (recv_time - send_time) * 1000
-                
-                # Store metrics
-                metric = PacketMetrics(
-                    msg_id=msg_id,
-                    send_time=send_time,
-                    recv_time=recv_time,
-                    payload_size=len(payload),
-                    latency_ms=latency_ms
-                )
-                
-                with self._lock:
-                    self.metrics.append(metric)
-                
-                packets_received += 1
-                
-                # Print progress
-                if self.config.print_logs and msg_id % self.config.log_frequency == 0:
-                    print(f"[Receiver] Received packet {msg_id}, "
-                          f"Latency: {latency_ms:.2f} ms")
-                
-            except socket.timeout:
-                consecutive_timeouts += 1
-                if consecutive_timeouts >= max_timeouts:
-                    print(f"[Receiver] Timeout limit reached, stopping...")
-                    break
             except Exception as e:
                 if self.running:  # Only print error if we're still supposed to be running
                     print(f"[Receiver] Error: {e}")
                 break
+    
+    async def _watch_udp(self):
+        """Stop receiving once the UDP socket has been idle for too long
+        
+        Datagrams themselves are recorded as they arrive, by _DatagramReceiver
+        or by _on_udp_batch_readable when batching.
+        """
+        consecutive_timeouts = 0
+        max_timeouts = 20
+        last_count = len(self._msg_id)
+        
+        while self.running:
+            await asyncio.sleep(1.0)
+            if len(self._msg_id) != last_count:
+                last_count = len(self._msg_id)
+                consecutive_timeouts = 0
+                continue
+            
+            consecutive_timeouts += 1
+            if consecutive_timeouts >= max_timeouts:
+                print(f"[Receiver] Timeout limit reached, stopping...")
+                break
+        
+        if self._rx_batch:
+            self.loop.remove_reader(self.sock.fileno())
+    
+    def _on_udp_batch_readable(self):
+        """Drain a burst of datagrams with one recvmmsg and record each of them"""
+        try:
+            count = self._rx_batch.recv(self.sock.fileno())
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"[Receiver] Error: {e}")
+            return
+        
+        self._record_batch(self._rx_batch, count, time.time_ns())
+    
+    def _record_packet(self, data: bytes, recv_time_ns: int):
+        """Parse a received packet and store its metrics"""
+        msg_id, send_time_ns, payload = self._parse_packet(data)
+        
+        # Calculate latency
+        latency_ns = recv_time_ns - send_time_ns
         
-        print(f"\n[Receiver] Finished! Received {packets_received} packets\n")
+        # Store metrics (single-threaded: only the event loop touches these)
+        self._msg_id.append(msg_id)
+        self._send_time_ns.append(send_time_ns)
+        self._recv_time_ns.append(recv_time_ns)
+        self._payload_size.append(len(payload))
+        self._latency_ns.append(latency_ns)
+        
+        # Print progress (>= so a lost or reordered packet can't stall logging)
+        if msg_id >= self._next_rx_log:
+            self._log_received(msg_id, latency_ns)
+    
+    def _record_batch(self, batch: mmsg.MMsgBatch, count: int, recv_time_ns: int):
+        """Parse the first count datagrams of a batch straight into the metric arrays
+        
+        Headers are unpacked in place from the batch buffer, so no per-packet
+        slice, payload copy or tuple return is made on this path.
+        """
+        unpack_from = self._hdr_struct.unpack_from
+        hdr_size = self._hdr_struct.size
+        buf = batch.buf
+        slot_size = batch.slot_size
+        
+        for i in range(count):
+            length = batch.length(i)
+            if length < hdr_size:
+                print(f"[Receiver] Error: Packet too short")
+                continue
+            
+            msg_id, send_time_ns, payload_len = unpack_from(buf, i * slot_size)
+            latency_ns = recv_time_ns - send_time_ns
+            
+            self._msg_id.append(msg_id)
+            self._send_time_ns.append(send_time_ns)
+            self._recv_time_ns.append(recv_time_ns)
+            self._payload_size.append(min(payload_len, length - hdr_size))
+            self._latency_ns.append(latency_ns)
+            
+            if msg_id >= self._next_rx_log:
+                self._log_received(msg_id, latency_ns)
+    
+    def _log_received(self, msg_id: int, latency_ns: int):
+        """Print a receiver progress line and schedule the next one"""
+        print(f"[Receiver] Received packet {msg_id}, "
+              f"Latency: {latency_ns / 1e6:.2f} ms")
+        frequency = self.config.log_frequency
+        self._next_rx_log = (msg_id // frequency + 1) * frequency
+    
+    def _make_fixed_frame_reader(self, frame_size: int):
+        """Build a frame reader with the frame size folded in
+        
+        Each frame is read with a single recv_into loop into one reused buffer,
+        with no header unpack or per-frame allocation. The returned frame is only
+        valid until the next call, which is fine because _record_packet consumes
+        it straight away.
+        """
+        sock = self.sock
+        sock_recv_into = self.loop.sock_recv_into
+        set_quickack = self._set_quickack
+        hdr_size = self._hdr_struct.size
+        
+        frame = bytearray(frame_size)
+        view = memoryview(frame)
+        expected_len = (frame_size - hdr_size).to_bytes(4, 'little')
+        
+        async def recv_fixed_frame() -> bytes:
+            off = 0
+            while off < frame_size:
+                got = await sock_recv_into(sock, view[off:])
+                if not got:
+                    return b''  # Connection closed
+                off += got
+            set_quickack(sock)
+            
+            if frame[hdr_size - 4:hdr_size] != expected_len:
+                raise ValueError("Payload size changed mid-stream")
+            return frame
+        
+        return recv_fixed_frame
     
-    def _recv_tcp_packet(self) -> bytes:
+    async def _recv_tcp_packet(self) -> bytes:
         """Receive a complete TCP packet (header + payload)"""
         # First, read the header (16 bytes)
-        header = self._recv_exactly(16)
+        header = await self._recv_exactly(self._hdr_struct.size)
         if not header:
             return b''
         
         # Parse payload length from header
-        _, _, payload_len = struct.unpack('<Idi', header)
+        _, _, payload_len = self._hdr_struct.unpack_from(header, 0)
         
-        # Read the payload
-        payload = self._recv_exactly(payload_len)
+        # Read the payload straight into the tail of the frame buffer
+        frame = bytearray(self._hdr_struct.size + payload_len)
+        frame[:self._hdr_struct.size] = header
+        if not await self._recv_into(memoryview(frame)[self._hdr_struct.size:]):
+            return b''
         
-        return header + payload
+        return frame
     
-    def _recv_exactly(self, n: int) -> bytes:
+    async def _recv_exactly(self, n: int) -> bytes:
         """Receive exactly n bytes from TCP socket"""
-        data = b''
-        while len(data) < n:
-            try:
-                chunk = self.sock.recv(n - len(data))
-                if not chunk:
-                    return b''  # Connection closed
-                data += chunk
-            except socket.timeout:
-                return b''
-        return data
+        buf = bytearray(n)
+        if not await self._recv_into(memoryview(buf)):
+            return b''
+        return buf
+    
+    async def _recv_into(self, view: memoryview) -> bool:
+        """Fill view completely from TCP socket; False if the connection closed"""
+        off = 0
+        n = len(view)
+        while off < n:
+            got = await self.loop.sock_recv_into(self.sock, view[off:])
+            if not got:
+                return False  # Connection closed
+            off += got
+        self._set_quickack(self.sock)
+        return True
+    
+    @staticmethod
+    def _set_quickack(sock: socket.socket):
+        """Disable delayed ACKs (Linux clears this after every recv, so re-arm it)"""
+        if hasattr(socket, 'TCP_QUICKACK'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
     
     ###########################################################################
     # Results Processing
     ###########################################################################
     
-    def _display_results(self):
+    def _compute_stats(self) -> Dict[str, Dict]:
+        """Compute latency and throughput statistics once for display and saving"""
+        stats = {}
+        n = len(self._latency_ns)
+        if not n:
+            return stats
+        
+        # One sort gives min/max/percentiles by index; sum() runs in C
+        latencies = sorted(self._latency_ns)
+        stats['latency'] = {
+            'min_ms': latencies[0] / 1e6,
+            'max_ms': latencies[-1] / 1e6,
+            'avg_ms': sum(latencies) / n / 1e6,
+            'median_ms': latencies[n//2] / 1e6,
+            'p95_ms': latencies[int(n*0.95)] / 1e6,
+            'p99_ms': latencies[int(n*0.99)] / 1e6
+        }
+        
+        if n > 1:
+            time_span = (max(self._recv_time_ns) - min(self._recv_time_ns)) / 1e9
+            total_bytes = sum(self._payload_size)
+            if time_span > 0:
+                stats['throughput'] = {
+                    'total_bytes': total_bytes,
+                    'time_span_s': time_span,
+                    'throughput_bps': (total_bytes * 8) / time_span
+                }
+        
+        return stats
+    
+    def _display_results(self, stats: Dict[str, Dict]):
         """Display benchmark results"""
-        if not self.metrics and not self.sent_packets:
+        if not self._msg_id and not self._sent_count:
             print("No metrics collected!")
             return
         
-        packets_sent = len(self.sent_packets)
-        packets_received = len(self.metrics)
+        packets_sent = self._sent_count
+        packets_received = len(self._msg_id)
         
         print(f"\n{'='*70}")
         print(f"BENCHMARK RESULTS")
@@ -407,35 +962,28 @@ class NetworkBenchmark:
             packet_loss = ((packets_sent - packets_received) / packets_sent * 100)
             print(f"Packet Loss:      {packet_loss:.2f}%")
         
-        if self.metrics:
-            # Calculate latency statistics
-            latencies = [m.latency_ms for m in self.metrics]
-            latencies.sort()
-            
+        if 'latency' in stats:
+            latency = stats['latency']
             print(f"\n--- Latency Statistics ---")
-            print(f"Min:              {min(latencies):.2f} ms")
-            print(f"Max:              {max(latencies):.2f} ms")
-            print(f"Average:          {sum(latencies)/len(latencies):.2f} ms")
-            print(f"Median:           {latencies[len(latencies)//2]:.2f} ms")
-            print(f"95th percentile:  {latencies[int(len(latencies)*0.95)]:.2f} ms")
-            print(f"99th percentile:  {latencies[int(len(latencies)*0.99)]:.2f} ms")
-            
-            # Calculate throughput
-            if len(self.metrics) > 1:
-                time_span = max(m.recv_time for m in self.metrics) - min(m.recv_time for m in self.metrics)
-                total_bytes = sum(m.payload_size for m in self.metrics)
-                
-                if time_span > 0:
-                    throughput_bps = (total_bytes * 8) / time_span
-                    print(f"\n--- Throughput Statistics ---")
-                    print(f"Total Bytes:      {total_bytes}")
-                    print(f"Time Span:        {time_span:.2f} seconds")
-                    print(f"Throughput:       {throughput_bps/1000:.2f} kbps")
-                    print(f"Throughput:       {throughput_bps/1_000_000:.2f} Mbps")
+            print(f"Min:              {latency['min_ms']:.2f} ms")
+            print(f"Max:              {latency['max_ms']:.2f} ms")
+            print(f"Average:          {latency['avg_ms']:.2f} ms")
+            print(f"Median:           {latency['median_ms']:.2f} ms")
+            print(f"95th percentile:  {latency['p95_ms']:.2f} ms")
+            print(f"99th percentile:  {latency['p99_ms']:.2f} ms")
+        
+        if 'throughput' in stats:
+            throughput = stats['throughput']
+            throughput_bps = throughput['throughput_bps']
+            print(f"\n--- Throughput Statistics ---")
+            print(f"Total Bytes:      {throughput['total_bytes']}")
+            print(f"Time Span:        {throughput['time_span_s']:.2f} seconds")
+            print(f"Throughput:       {throughput_bps/1000:.2f} kbps")
+            print(f"Throughput:       {throughput_bps/1_000_000:.2f} Mbps")
         
         print(f"{'='*70}\n")
     
-    def _save_results(self):
+    def _save_results(self, stats: Dict[str, Dict]):
         """Save results to JSON file"""
         results = {
             'config': {
@@ -447,39 +995,64 @@ class NetworkBenchmark:
                 'send_delay': self.config.send_delay
             },
             'summary': {
-                'packets_sent': len(self.sent_packets),
-                'packets_received': len(self.metrics),
-                'packet_loss_pct': ((len(self.sent_packets) - len(self.metrics)) / 
-                                   max(len(self.sent_packets), 1) * 100) if self.sent_packets else 0
-            },
-            'metrics': [m.to_dict() for m in self.metrics]
+                'packets_sent': self._sent_count,
+                'packets_received': len(self._msg_id),
+                'packet_loss_pct': ((self._sent_count - len(self._msg_id)) / 
+                                   max(self._sent_count, 1) * 100) if self._sent_count else 0
+            }
         }
         
-        # Calculate stats if we have metrics
-        if self.metrics:
-            latencies = [m.latency_ms for m in self.metrics]
-            latencies.sort()
-            
-            results['summary']['latency'] = {
-                'min_ms': min(latencies),
-                'max_ms': max(latencies),
-                'avg_ms': sum(latencies) / len(latencies),
-                'median_ms': latencies[len(latencies)//2],
-                'p95_ms': latencies[int(len(latencies)*0.95)],
-                'p99_ms': latencies[int(len(latencies)*0.99)]
-            }
-            
-            if len(self.metrics) > 1:
-                time_span = max(m.recv_time for m in self.metrics) - min(m.recv_time for m in self.metrics)
-                total_bytes = sum(m.payload_size for m in self.metrics)
-                if time_span > 0:
-                    results['summary']['throughput_bps'] = (total_bytes * 8) / time_span
+        if 'latency' in stats:
+            results['summary']['latency'] = stats['latency']
+        if 'throughput' in stats:
+            results['summary']['throughput_bps'] = stats['throughput']['throughput_bps']
         
         with open(self.config.results_file, 'w') as f:
-            json.dump(results, f, indent=2)
+            # Write config/summary, then stream the per-packet rows straight from
+            # the metric arrays so a long run never builds one dict per packet
+            f.write(json.dumps(results, indent=2)[:-2])  # Drop the closing "\n}"
+            f.write(',\n  "metrics": [')
+            
+            sep = '\n    '
+            for msg_id, send_ns, recv_ns, size, latency_ns in zip(*self._metric_columns()):
+                # Same keys as PacketMetrics; float repr is what json.dumps emits
+                f.write(f'{sep}{{"msg_id": {msg_id}, "send_time": {send_ns / 1e9!r}, '
+                        f'"recv_time": {recv_ns / 1e9!r}, "payload_size": {size}, '
+                        f'"latency_ms": {latency_ns / 1e6!r}}}')
+                sep = ',\n    '
+            
+            f.write('\n  ]\n}\n')
         
         print(f"Results saved to: {self.config.results_file}")
 
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    """Records UDP packets straight from the event loop's read callback"""
+    
+    def __init__(self, benchmark: NetworkBenchmark):
+        self.benchmark = benchmark
+    
+    def datagram_received(self, data: bytes, addr: Tuple):
+        self.benchmark.client_addr = addr
+        try:
+            self.benchmark._record_packet(data, time.time_ns())
+        except Exception as e:
+            print(f"[Receiver] Error: {e}")
+    
+    def error_received(self, exc: Exception):
+        print(f"[Receiver] Error: {exc}")
+
+def _receiver_entry(config: BenchmarkConfig, ready, stop, results):
+    """Receiver process entry point: receive until told to stop, then report metrics"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles Ctrl+C
+    
+    benchmark = NetworkBenchmark(replace(config, is_sender=False))
+    benchmark._open()
+    ready.set()
+    
+    stop.wait()
+    benchmark._close()
+    results.put(benchmark._metric_columns())
+
 ###############################################################################
 # Command Line Interface
 ###############################################################################
@@ -510,6 +1083,21 @@ def main():
                        help='Maximum packets to send (default: 1000)')
     parser.add_argument('--send-delay', type=float, default=0.01,
                        help='Delay between packets in seconds (default: 0.01)')
+    parser.add_argument('--sndbuf', type=int, default=4 * 1024 * 1024,
+                       help='Socket send buffer size in bytes (default: 4 MiB)')
+    parser.add_argument('--rcvbuf', type=int, default=4 * 1024 * 1024,
+                       help='Socket receive buffer size in bytes (default: 4 MiB)')
+    parser.add_argument('--batch-size', type=int, default=1,
+                       help='UDP datagrams per sendmmsg/recvmmsg call (default: 1, no batching)')
+    parser.add_argument('--busy-poll-us', type=int, default=0,
+                       help='SO_BUSY_POLL microseconds, spins a CPU core (default: 0, off)')
+    parser.add_argument('--sender-cpu', type=int, default=None,
+                       help='Pin the sender to this CPU core (default: unpinned)')
+    parser.add_argument('--receiver-cpu', type=int, default=None,
+                       help='Pin the receiver to this CPU core (default: unpinned)')
+    parser.add_argument('--rt-priority', type=int, default=None,
+                       help='Run sender/receiver under SCHED_FIFO at this priority, 1-99 '
+                            '(needs root; avoid with sub-2 ms --send-delay, which spins)')
     parser.add_argument('--duration', type=int, default=None,
                        help='Run for specified seconds (overrides max-packets)')
     
@@ -545,6 +1133,13 @@ def main():
         payload_size=args.payload_size,
         max_packets=args.max_packets,
         send_delay=args.send_delay,
+        sndbuf=args.sndbuf,
+        rcvbuf=args.rcvbuf,
+        batch_size=args.batch_size,
+        busy_poll_us=args.busy_poll_us,
+        sender_cpu=args.sender_cpu,
+        receiver_cpu=args.receiver_cpu,
+        rt_priority=args.rt_priority,
         is_sender=is_sender,
         is_receiver=is_receiver,
         print_logs=not args.quiet,
@@ -564,8 +1159,8 @@ def main():
             time.sleep(args.duration)
         else:
             # Wait for sender to finish
-            if benchmark.sender_thread:
-                benchmark.sender_thread.join()
+            if config.is_sender:
+                benchmark.sender_done.wait()
             # Give receiver a bit more time to catch up
             time.sleep(2)
         
@@ -1,7 +1,8 @@
 import socket
 import ipaddress
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+import errno
+import selectors
+import time
 
 def check_host(ip, port=5000, timeout=0.5):
     """Check if a host has the specified port open."""
@@ -17,36 +18,73 @@ def check_host(ip, port=5000, timeout=0.5):
         pass
     return None
 
-def scan_network_socket(network="172.20.10.0/28", port=5000, max_workers=100):
+def scan_network_socket(network="172.20.10.0/28", port=5000, max_workers=100, timeout=0.5):
     """
     Fast network scanner using pure Python.
-    Scans entire subnet in parallel.
+    Scans entire subnet in parallel from a single thread: non-blocking
+    connects are multiplexed with a selector, keeping up to max_workers
+    attempts in flight at once.
     """
     print(f"Scanning {network} for devices with port {port} open...")
     
     network_obj = ipaddress.ip_network(network, strict=False)
     hosts = list(network_obj.hosts())
+    pending = iter(hosts)
     
     found_devices = []
     completed = 0
     total = len(hosts)
+    selector = selectors.DefaultSelector()
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all scan jobs
-        future_to_ip = {
-            executor.submit(check_host, ip, port): ip 
-            for ip in hosts
-        }
+    def finish(sock, ip, is_open):
+        nonlocal completed
+        if sock is not None:
+            selector.unregister(sock)
+            sock.close()
         
-        # Collect results as they complete
-        for future in as_completed(future_to_ip):
-            completed += 1
-            if completed % 50 == 0:
-                print(f"Progress: {completed}/{total} hosts scanned...")
+        completed += 1
+        if completed % 50 == 0:
+            print(f"Progress: {completed}/{total} hosts scanned...")
+        
+        if is_open:
+            found_devices.append(str(ip))
+            print(f"  ✓ Found device at {ip}")
+    
+    def launch():
+        # Top up the in-flight set with new connection attempts
+        while len(selector.get_map()) < max_workers:
+            ip = next(pending, None)
+            if ip is None:
+                return
             
-            result = future.result()
-            if result:
-                found_devices.append(result)
-                print(f"  ✓ Found device at {result}")
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            result = sock.connect_ex((str(ip), port))
+            if result not in (0, errno.EINPROGRESS):
+                sock.close()
+                finish(None, ip, False)
+                continue
+            
+            # Writable once the connect completes (or fails)
+            selector.register(sock, selectors.EVENT_WRITE, (ip, time.monotonic() + timeout))
+    
+    launch()
+    while selector.get_map():
+        keys = list(selector.get_map().values())
+        next_deadline = min(key.data[1] for key in keys)
+        
+        for key, _ in selector.select(timeout=max(0, next_deadline - time.monotonic())):
+            sock = key.fileobj
+            is_open = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+            finish(sock, key.data[0], is_open)
+        
+        # Give up on hosts that haven't answered in time
+        now = time.monotonic()
+        for key in list(selector.get_map().values()):
+            if key.data[1] <= now:
+                finish(key.fileobj, key.data[0], False)
+        
+        launch()
     
+    selector.close()
     return found_devices
\ No newline at end of file